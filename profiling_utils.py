@@ -0,0 +1,144 @@
+# profiling_utils.py
+
+import cProfile
+import glob
+import hashlib
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 作業ディレクトリに依存しないよう、このモジュールと同じフォルダ配下に保存する
+PROFILE_DIR = os.environ.get(
+    "PDFCONVERT_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+)
+
+# tracemalloc・プロファイラはプロセス全体で共有されるため、同時に1セッションのみ取得する
+_profile_lock = threading.Lock()
+
+def _snapshot_filters():
+    """
+    変換処理に関係するコード（pdf_utils・streamlit_app・openpyxl・pdfplumber/pdfminer）の確保箇所のみ残す。
+    同時に実行中の他セッションの変換も同じコードを通るため、完全には分離できない。
+    """
+    return [
+        tracemalloc.Filter(True, "*pdf_utils.py"),
+        tracemalloc.Filter(True, "*streamlit_app.py"),
+        tracemalloc.Filter(True, "*openpyxl*"),
+        tracemalloc.Filter(True, "*pdfplumber*"),
+        tracemalloc.Filter(True, "*pdfminer*"),
+    ]
+
+def compute_pdf_hash(pdf_bytes: bytes) -> str:
+    """入力PDFのSHA-256ハッシュを返す"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def start_conversion_profile() -> Optional[Dict[str, Any]]:
+    """
+    1回の変換処理のプロファイル取得（cProfile + tracemalloc）を開始する。
+    他のセッションが取得中の場合は None を返す。
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    started_tracemalloc = False
+    try:
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        baseline = tracemalloc.take_snapshot().filter_traces(_snapshot_filters())
+        profiler = cProfile.Profile()
+        profiler.enable()
+    except Exception:
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _profile_lock.release()
+        raise
+    return {'profiler': profiler, 'baseline': baseline, 'started_tracemalloc': started_tracemalloc}
+
+def stop_conversion_profile(session: Dict[str, Any]) -> None:
+    """
+    プロファイラとtracemalloc を停止してロックを解放する。
+    変換処理が途中で失敗・中断しても必ず呼び出すこと。
+    """
+    if session.get('stopped'):
+        return
+    try:
+        session['profiler'].disable()
+        session['current_memory'], session['peak_memory'] = tracemalloc.get_traced_memory()
+        session['snapshot'] = tracemalloc.take_snapshot().filter_traces(_snapshot_filters())
+    finally:
+        if session['started_tracemalloc']:
+            tracemalloc.stop()
+        session['stopped'] = True
+        _profile_lock.release()
+
+def _build_profile_result(pdf_hash: str, prof_path: str, summary_path: str) -> Dict[str, Any]:
+    with open(summary_path, encoding="utf-8") as f:
+        summary = f.read()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(prof_path, arcname=os.path.basename(prof_path))
+        zf.write(summary_path, arcname=os.path.basename(summary_path))
+    return {
+        'pdf_hash': pdf_hash,
+        'base_name': os.path.splitext(os.path.basename(prof_path))[0],
+        'prof_path': prof_path,
+        'summary_path': summary_path,
+        'summary': summary,
+        'archive_bytes': archive.getvalue(),
+    }
+
+def load_saved_profile(pdf_hash: str) -> Optional[Dict[str, Any]]:
+    """同じPDFのプロファイルが保存済みであれば、最新のものを読み込んで返す"""
+    prof_files = glob.glob(os.path.join(PROFILE_DIR, f"{pdf_hash[:16]}_*.prof"))
+    for prof_path in sorted(prof_files, reverse=True):
+        summary_path = prof_path[:-len(".prof")] + "_summary.txt"
+        if os.path.exists(summary_path):
+            return _build_profile_result(pdf_hash, prof_path, summary_path)
+    return None
+
+def save_conversion_profile(session: Dict[str, Any], pdf_hash: str, top_n: int = 30) -> Dict[str, Any]:
+    """
+    停止済みのプロファイル結果を、入力PDFのハッシュ名で保存する。
+    pstats形式のプロファイルと上位N件のサマリ（処理時間・取得中に増えたメモリ確保箇所）を書き出す。
+    """
+    profiler = session['profiler']
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name = f"{pdf_hash[:16]}_{timestamp}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    prof_path = os.path.join(PROFILE_DIR, f"{base_name}.prof")
+    summary_path = os.path.join(PROFILE_DIR, f"{base_name}_summary.txt")
+
+    profiler.dump_stats(prof_path)
+
+    stats_stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stats_stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+
+    alloc_diff = session['snapshot'].compare_to(session['baseline'], 'lineno')
+    alloc_lines = [str(stat) for stat in alloc_diff[:top_n]]
+    peak_label = "ピーク" if session['started_tracemalloc'] else "ピーク（取得開始前を含む）"
+
+    summary = "\n".join([
+        f"PDF SHA-256: {pdf_hash}",
+        f"取得日時: {timestamp}",
+        "※ メモリの数値はプロセス全体の値です。同時に実行中の他セッションの処理も含まれる場合があります。",
+        f"メモリ使用量（プロセス全体）: 現在 {session['current_memory'] / 1024 / 1024:.1f} MiB / "
+        f"{peak_label} {session['peak_memory'] / 1024 / 1024:.1f} MiB",
+        "",
+        f"=== 処理時間 上位{top_n}件（累積時間順） ===",
+        stats_stream.getvalue().strip(),
+        "",
+        f"=== 取得中のメモリ確保箇所 上位{top_n}件（開始時との差分・変換関連コードのみ、プロセス全体） ===",
+        *alloc_lines,
+        "",
+    ])
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(summary)
+
+    return _build_profile_result(pdf_hash, prof_path, summary_path)
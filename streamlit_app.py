@@ -11,6 +11,10 @@ from pdf_utils import (
     find_correct_anchor_for_bento, extract_bento_range_for_bento, match_bento_data, 
     extract_detailed_client_info_from_pdf, export_detailed_client_data_to_dataframe
 )
+from profiling_utils import (
+    compute_pdf_hash, start_conversion_profile, stop_conversion_profile,
+    save_conversion_profile, load_saved_profile
+)
 
 st.set_page_config(
     page_title="PDF変換ツール",
@@ -64,6 +68,8 @@ if 'master_df' not in st.session_state:
     st.session_state.master_df = load_master_data("商品マスタ一覧", ['商品予定名', 'パン箱入数', '商品名', '売価単価', '弁当区分'])
 if 'customer_master_df' not in st.session_state:
     st.session_state.customer_master_df = load_master_data("得意先マスタ一覧", ['得意先ＣＤ', '得意先名'])
+if 'profile_results' not in st.session_state:
+    st.session_state.profile_results = {}
 
 st.markdown("""
     <style>
@@ -81,15 +87,17 @@ st.sidebar.page_link("streamlit_app.py", label="PDF Excel 変換", icon="📄")
 st.sidebar.page_link("pages/マスタ設定.py", label="マスタ設定", icon="⚙️")
 st.markdown('<p class="custom-title">数出表 PDF変換ツール</p>', unsafe_allow_html=True)
 show_debug = st.sidebar.checkbox("デバッグ情報を表示", value=False)
+# プロファイル取得は運用担当者向けのため、環境変数 PDFCONVERT_ENABLE_PROFILING=1 の場合のみ表示する
+enable_profiling = False
+if os.environ.get("PDFCONVERT_ENABLE_PROFILING") == "1":
+    enable_profiling = st.sidebar.checkbox(
+        "プロファイルを取得", value=False,
+        help="変換処理の実行時間とメモリ確保箇所を記録し、profilesフォルダに保存します（メモリの数値はプロセス全体の値です）"
+    )
 uploaded_pdf = st.file_uploader("処理するPDFファイルをアップロードしてください", type="pdf", label_visibility="collapsed")
 
-if uploaded_pdf is not None:
-    template_path = "template.xlsm"
-    nouhinsyo_path = "nouhinsyo.xlsx"
-    if not os.path.exists(template_path) or not os.path.exists(nouhinsyo_path):
-        st.error(f"必要なテンプレートファイルが見つかりません：'{template_path}' または '{nouhinsyo_path}'")
-        st.stop()
-    
+def run_conversion(uploaded_pdf, template_path, nouhinsyo_path, show_debug):
+    """アップロードされたPDFから数出表・納品書のExcelを作成し、ダウンロードボタンを表示する"""
     template_wb = load_workbook(template_path, keep_vba=True)
     nouhinsyo_wb = load_workbook(nouhinsyo_path)
     pdf_bytes_io = io.BytesIO(uploaded_pdf.getvalue())
@@ -220,3 +228,44 @@ if uploaded_pdf is not None:
                 )
         except Exception as e:
             st.error(f"Excelファイル生成中にエラーが発生しました: {str(e)}")
+
+if uploaded_pdf is not None:
+    template_path = "template.xlsm"
+    nouhinsyo_path = "nouhinsyo.xlsx"
+    if not os.path.exists(template_path) or not os.path.exists(nouhinsyo_path):
+        st.error(f"必要なテンプレートファイルが見つかりません：'{template_path}' または '{nouhinsyo_path}'")
+        st.stop()
+
+    profile_session, profile_result, pdf_hash = None, None, None
+    if enable_profiling:
+        pdf_hash = compute_pdf_hash(uploaded_pdf.getvalue())
+        # 同じPDFのプロファイルが保存済みなら再取得しない
+        profile_result = st.session_state.profile_results.get(pdf_hash) or load_saved_profile(pdf_hash)
+        if profile_result is None:
+            profile_session = start_conversion_profile()
+            if profile_session is None:
+                st.warning("他の処理がプロファイル取得中のため、今回はプロファイルを取得しません")
+
+    try:
+        run_conversion(uploaded_pdf, template_path, nouhinsyo_path, show_debug)
+    finally:
+        if profile_session is not None:
+            stop_conversion_profile(profile_session)
+
+    # 変換が最後まで実行された場合のみ保存する（例外・再実行による中断時は停止のみ）
+    if profile_session is not None:
+        try:
+            profile_result = save_conversion_profile(profile_session, pdf_hash)
+        except Exception as e:
+            st.error(f"プロファイル保存中にエラーが発生しました: {str(e)}")
+
+    if profile_result is not None:
+        st.session_state.profile_results[pdf_hash] = profile_result
+        st.info(f"プロファイルの保存先: {profile_result['prof_path']}")
+        st.download_button(
+            label="▼　プロファイルダウンロード", data=profile_result['archive_bytes'],
+            file_name=f"{profile_result['base_name']}_profile.zip",
+            mime="application/zip"
+        )
+        if show_debug:
+            st.text(profile_result['summary'])
@@ -0,0 +1,45 @@
+import io
+import os
+import tracemalloc
+import zipfile
+
+import profiling_utils
+
+
+def test_profile_capture_lifecycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling_utils, "PROFILE_DIR", str(tmp_path))
+    pdf_hash = profiling_utils.compute_pdf_hash(b"%PDF-1.4 dummy")
+
+    session = profiling_utils.start_conversion_profile()
+    assert session is not None
+    # 取得中は他のセッションから開始できない
+    assert profiling_utils.start_conversion_profile() is None
+
+    sum(range(1000))
+    profiling_utils.stop_conversion_profile(session)
+    profiling_utils.stop_conversion_profile(session)
+    assert not tracemalloc.is_tracing()
+
+    # ロックが解放されていれば再度開始できる
+    second = profiling_utils.start_conversion_profile()
+    assert second is not None
+    profiling_utils.stop_conversion_profile(second)
+
+    result = profiling_utils.save_conversion_profile(session, pdf_hash, top_n=5)
+    assert os.path.dirname(result['prof_path']) == str(tmp_path)
+    assert os.path.basename(result['prof_path']).startswith(pdf_hash[:16] + "_")
+    assert result['prof_path'].endswith(".prof")
+    assert result['summary_path'] == result['prof_path'][:-len(".prof")] + "_summary.txt"
+    assert os.path.exists(result['prof_path'])
+    assert os.path.exists(result['summary_path'])
+    assert pdf_hash in result['summary']
+
+    with zipfile.ZipFile(io.BytesIO(result['archive_bytes'])) as zf:
+        assert sorted(zf.namelist()) == sorted([
+            os.path.basename(result['prof_path']),
+            os.path.basename(result['summary_path']),
+        ])
+
+    saved = profiling_utils.load_saved_profile(pdf_hash)
+    assert saved['prof_path'] == result['prof_path']
+    assert profiling_utils.load_saved_profile("0" * 64) is None